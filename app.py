@@ -8,7 +8,6 @@ from src.config import COLORS, COLOR_SEQUENCE, CHART_CONFIG, REQUIRED_COLUMNS, d
 from src.data_processing import load_from_db, calculate_kpis
 from src.db import fetch_last_upload
 from src.utils import delta
-from src.chart_export import build_charts_excel
 from src.pages import analysis, employee_data
 
 # ===================== PAGE CONFIG =====================
@@ -770,10 +769,19 @@ st.markdown("---")
 
 # ===================== DOWNLOAD CHARTS =====================
 from datetime import date as _date
-_excel_buf = build_charts_excel(filtered_df, kpis)
+
+
+@st.cache_data(show_spinner=False)
+def _charts_excel_bytes(filtered_df: pd.DataFrame, kpis: dict) -> bytes:
+    # openpyxl is only needed once a dataset is loaded; keep it off the
+    # landing-page import path.
+    from src.chart_export import build_charts_excel
+    return build_charts_excel(filtered_df, kpis).getvalue()
+
+
 st.download_button(
     label="⬇ Download All Charts (Excel)",
-    data=_excel_buf,
+    data=_charts_excel_bytes(filtered_df, kpis),
     file_name=f"hr_dashboard_charts_{_date.today()}.xlsx",
     mime="application/vnd.openxmlformats-officedocument.spreadsheetml.sheet",
 )
@@ -11,6 +11,8 @@ from openpyxl.chart.label import DataLabelList
 from openpyxl.styles import Font, PatternFill, Alignment, Border, Side
 from openpyxl.utils import get_column_letter
 
+from src.data_processing import _status_flags, observed_counts
+
 
 # ── Theme colours (ARGB hex without #) ────────────────────────────────────
 _PURPLE = '7C3AED'
@@ -187,7 +189,7 @@ def build_charts_excel(filtered_df: pd.DataFrame, kpis: dict) -> io.BytesIO:
 
     # ── 2. Gender Distribution ────────────────────────────────────────────
     ws = wb.create_sheet('Gender Distribution')
-    gender_df = filtered_df['Gender'].value_counts().reset_index()
+    gender_df = observed_counts(filtered_df['Gender']).reset_index()
     gender_df.columns = ['Gender', 'Count']
     _add_title(ws, 'Gender Distribution')
     end = _write_table(ws, gender_df, start_row=3)
@@ -196,7 +198,7 @@ def build_charts_excel(filtered_df: pd.DataFrame, kpis: dict) -> io.BytesIO:
 
     # ── 3. Employment Status ──────────────────────────────────────────────
     ws = wb.create_sheet('Employment Status')
-    status_df = filtered_df['Employee Status'].value_counts().reset_index()
+    status_df = observed_counts(filtered_df['Employee Status']).reset_index()
     status_df.columns = ['Status', 'Count']
     _add_title(ws, 'Employment Status')
     end = _write_table(ws, status_df, start_row=3)
@@ -205,7 +207,10 @@ def build_charts_excel(filtered_df: pd.DataFrame, kpis: dict) -> io.BytesIO:
 
     # ── 4. Department Breakdown ───────────────────────────────────────────
     ws = wb.create_sheet('Department Breakdown')
-    dept_status = filtered_df.groupby('Department')['Employee Status'].value_counts().unstack(fill_value=0).reset_index()
+    dept_status = (
+        filtered_df.groupby(['Department', 'Employee Status'], observed=True).size()
+        .unstack(fill_value=0).reset_index()
+    )
     _add_title(ws, 'Department Breakdown (Active vs Departed)')
     end = _write_table(ws, dept_status, start_row=3)
     val_cols = [i + 2 for i in range(len(dept_status.columns) - 1)]
@@ -216,7 +221,7 @@ def build_charts_excel(filtered_df: pd.DataFrame, kpis: dict) -> io.BytesIO:
     # ── 5. Exit Types ─────────────────────────────────────────────────────
     if len(departed_df) > 0:
         ws = wb.create_sheet('Exit Types')
-        exit_df = departed_df['Exit Type'].value_counts().reset_index()
+        exit_df = observed_counts(departed_df['Exit Type']).reset_index()
         exit_df.columns = ['Exit Type', 'Count']
         _add_title(ws, 'Exit Types')
         end = _write_table(ws, exit_df, start_row=3)
@@ -226,7 +231,7 @@ def build_charts_excel(filtered_df: pd.DataFrame, kpis: dict) -> io.BytesIO:
     # ── 6. Exit Reason Categories ─────────────────────────────────────────
     if len(departed_df) > 0 and 'Exit Reason Category' in departed_df.columns:
         ws = wb.create_sheet('Exit Reasons')
-        reason_df = departed_df['Exit Reason Category'].value_counts().reset_index()
+        reason_df = observed_counts(departed_df['Exit Reason Category']).reset_index()
         reason_df.columns = ['Category', 'Count']
         _add_title(ws, 'Exit Reason Categories')
         end = _write_table(ws, reason_df, start_row=3)
@@ -235,9 +240,9 @@ def build_charts_excel(filtered_df: pd.DataFrame, kpis: dict) -> io.BytesIO:
               colours=[_PURPLE], height=max(10, len(reason_df) * 1.5))
 
     # ── 7. Departure Rate by Department ──────────────────────────────────
-    dept_attrition = filtered_df.groupby('Department').agg(
-        Active=('Employee Status', lambda x: (x == 'Active').sum()),
-        Departed=('Employee Status', lambda x: (x == 'Departed').sum()),
+    dept_attrition = _status_flags(filtered_df).groupby('Department', observed=True).agg(
+        Active=('_active', 'sum'),
+        Departed=('_departed', 'sum'),
         Total=('Employee Status', 'count')
     ).reset_index()
     dept_attrition['Departure Rate %'] = (
@@ -254,7 +259,7 @@ def build_charts_excel(filtered_df: pd.DataFrame, kpis: dict) -> io.BytesIO:
     # ── 8. Tenure by Department ───────────────────────────────────────────
     if 'Tenure (Months)' in filtered_df.columns:
         tenure_dept = (
-            filtered_df.groupby('Department')['Tenure (Months)']
+            filtered_df.groupby('Department', observed=True)['Tenure (Months)']
             .agg(['mean', 'median', 'count']).round(1)
             .rename(columns={'mean': 'Avg Tenure', 'median': 'Median Tenure', 'count': 'Count'})
             .reset_index().sort_values('Avg Tenure', ascending=False)
@@ -269,7 +274,7 @@ def build_charts_excel(filtered_df: pd.DataFrame, kpis: dict) -> io.BytesIO:
     # ── 9. Time-to-Departure ──────────────────────────────────────────────
     if len(departed_df) > 0 and 'Tenure (Months)' in departed_df.columns:
         ttd = (
-            departed_df.groupby('Department')['Tenure (Months)']
+            departed_df.groupby('Department', observed=True)['Tenure (Months)']
             .agg(Avg='mean', Median='median', Count='count')
             .round(1).reset_index().sort_values('Avg')
         )
@@ -282,9 +287,13 @@ def build_charts_excel(filtered_df: pd.DataFrame, kpis: dict) -> io.BytesIO:
 
     # ── 10. Early Departure Rate ──────────────────────────────────────────
     if len(departed_df) > 0 and 'Tenure (Months)' in departed_df.columns:
-        dept_stats = departed_df.groupby('Department').agg(
+        dept_stats = pd.DataFrame({
+            'Department': departed_df['Department'],
+            'Tenure (Months)': departed_df['Tenure (Months)'],
+            '_early': departed_df['Tenure (Months)'] <= 3,
+        }).groupby('Department', observed=True).agg(
             Total_Departed=('Tenure (Months)', 'count'),
-            Early_Departed=('Tenure (Months)', lambda x: (x <= 3).sum()),
+            Early_Departed=('_early', 'sum'),
         ).reset_index()
         dept_stats['Early Departure Rate %'] = (
             dept_stats['Early_Departed'] / dept_stats['Total_Departed'] * 100
@@ -323,7 +332,7 @@ def build_charts_excel(filtered_df: pd.DataFrame, kpis: dict) -> io.BytesIO:
     if 'Join Year' in filtered_df.columns:
         headcount = (
             filtered_df[filtered_df['Join Year'] > 2000]
-            .groupby('Join Year')['Employee Status'].value_counts()
+            .groupby(['Join Year', 'Employee Status'], observed=True).size()
             .unstack(fill_value=0).reset_index()
         )
         if len(headcount) > 0:
@@ -344,7 +353,7 @@ def build_charts_excel(filtered_df: pd.DataFrame, kpis: dict) -> io.BytesIO:
 
     # ── 13. Vendor Analysis ───────────────────────────────────────────────
     if 'Vendor' in filtered_df.columns:
-        vendor_df = filtered_df['Vendor'].value_counts().reset_index()
+        vendor_df = observed_counts(filtered_df['Vendor']).reset_index()
         vendor_df.columns = ['Vendor', 'Count']
         ws = wb.create_sheet('Vendor Analysis')
         _add_title(ws, 'Vendor / Source Analysis')
@@ -1,3 +1,5 @@
+from functools import lru_cache
+
 COLORS = {
     'primary':   '#7C3AED',   # purple
     'secondary': '#06B6D4',   # cyan
@@ -40,13 +42,23 @@ CHART_CONFIG = {
     'displaylogo': False,
 }
 
+# Shared Plotly settings for bar charts labelled with percentages
+LAYOUT_BAR = {'xaxis_tickangle': -45}
+TRACES_BAR_PCT = {'texttemplate': '%{text:.1f}%', 'textposition': 'outside'}
+
 
 def detect_name_column(df):
     """Detect the name column from various naming conventions."""
-    for c in df.columns:
-        if 'full' in str(c).lower() and 'name' in str(c).lower():
+    return _detect_name_column(tuple(df.columns))
+
+
+@lru_cache(maxsize=32)
+def _detect_name_column(columns):
+    lowered = [(str(c).lower(), c) for c in columns]
+    for low, c in lowered:
+        if 'full' in low and 'name' in low:
             return c
-    for c in df.columns:
-        if 'name' in str(c).lower() and c != 'Bank Name':
+    for low, c in lowered:
+        if 'name' in low and c != 'Bank Name':
             return c
     return None
@@ -1,3 +1,4 @@
+import re
 import pandas as pd
 import numpy as np
 import streamlit as st
@@ -5,6 +6,14 @@ from datetime import datetime
 from src.db import fetch_employees
 
 
+_CONTRACTOR_PATTERN = re.compile('freelancer|contract', re.IGNORECASE)
+
+# Low-cardinality label columns stored as categoricals so groupbys, value_counts
+# and equality filters run on integer codes
+CATEGORICAL_COLUMNS = ['Department', 'Employee Status', 'Exit Type', 'Gender', 'Employment Type', 'Nationality',
+                       'Vendor', 'Exit Reason Category']
+
+
 @st.cache_data
 def load_excel(file_path_or_buffer):
     """Load Excel file from path or uploaded buffer."""
@@ -21,6 +30,68 @@ def load_from_db() -> pd.DataFrame:
     return process_data(df)
 
 
+def _value_mask(series, value):
+    """Return a boolean ndarray of ``series == value``.
+
+    Categorical columns are compared on their integer codes, everything else
+    on the underlying numpy array, so no intermediate frames are built.
+    """
+    if isinstance(series.dtype, pd.CategoricalDtype):
+        categories = series.cat.categories
+        if value not in categories:
+            return np.zeros(len(series), dtype=bool)
+        return series.cat.codes.to_numpy() == categories.get_loc(value)
+    return series.to_numpy() == value
+
+
+def _status_flags(df):
+    """Return df with the int8 _active/_departed flags that process_data precomputes.
+
+    Frames that did not go through process_data get them built here from
+    Employee Status, so callers can sum the flags either way.
+    """
+    if '_active' in df.columns and '_departed' in df.columns:
+        return df
+    status = df['Employee Status']
+    return df.assign(
+        _active=_value_mask(status, 'Active').astype('int8'),
+        _departed=_value_mask(status, 'Departed').astype('int8'),
+    )
+
+
+def _contractor_mask(types):
+    """Boolean ndarray of rows whose employment type names a freelancer or contract.
+
+    The pattern is matched against each distinct type once, then broadcast by isin.
+    """
+    contractor_types = [t for t in types.unique()
+                        if isinstance(t, str) and _CONTRACTOR_PATTERN.search(t)]
+    return types.isin(contractor_types).to_numpy()
+
+
+def _period_labels(dates, freq='M'):
+    """Format a datetime Series as 'YYYY-MM' (freq 'M') or 'YYYYQn' (freq 'Q') labels.
+
+    Only the distinct periods are formatted; rows pick up their label through
+    integer codes, so no Period objects are built. Missing dates become 'NaT',
+    matching ``to_period(...).astype(str)``.
+    """
+    year = dates.dt.year.fillna(0).to_numpy(dtype='int64')
+    month = dates.dt.month.fillna(0).to_numpy(dtype='int64')
+    if freq == 'Q':
+        key = year * 10 + (month - 1) // 3 + 1
+    else:
+        key = year * 100 + month
+    key[dates.isna().to_numpy()] = -1
+
+    codes, uniques = pd.factorize(key)
+    if freq == 'Q':
+        labels = ['NaT' if k < 0 else f"{k // 10}Q{k % 10}" for k in uniques]
+    else:
+        labels = ['NaT' if k < 0 else f"{k // 100}-{k % 100:02d}" for k in uniques]
+    return np.array(labels, dtype=object)[codes]
+
+
 def process_data(df):
     """Process raw HR data: clean columns, parse dates, calculate derived fields."""
     # Ensure all column names are strings, then clean
@@ -45,48 +116,53 @@ def process_data(df):
 
     # Age
     if 'Birthday Date' in df.columns:
-        df['Age'] = ((today - df['Birthday Date']).dt.days / 365.25).fillna(0).astype(int)
+        age_days = np.floor((today.to_datetime64() - df['Birthday Date'].to_numpy()) / np.timedelta64(1, 'D'))
+        df['Age'] = np.nan_to_num(age_days / 365.25).astype(np.int16)
 
-    # Tenure in months
+    # Tenure in months: measure to today for active staff, to the exit date otherwise
     if 'Join Date' in df.columns:
+        end = today.to_datetime64()
         if 'Exit Date' in df.columns:
-            df['Tenure (Months)'] = np.where(
-                df['Employee Status'] == 'Active',
-                ((today - df['Join Date']).dt.days / 30.44).fillna(0),
-                ((df['Exit Date'] - df['Join Date']).dt.days / 30.44).fillna(0)
-            )
-        else:
-            df['Tenure (Months)'] = ((today - df['Join Date']).dt.days / 30.44).fillna(0)
-        df['Tenure (Months)'] = df['Tenure (Months)'].round(1)
+            end = np.where(_value_mask(df['Employee Status'], 'Active'), end, df['Exit Date'].to_numpy())
+        tenure_days = np.floor((end - df['Join Date'].to_numpy()) / np.timedelta64(1, 'D'))
+        df['Tenure (Months)'] = np.round(np.nan_to_num(tenure_days / 30.44), 1)
 
     # Time periods
     if 'Join Date' in df.columns:
         df['Join Year'] = df['Join Date'].dt.year
-        df['Join Month'] = df['Join Date'].dt.to_period('M').astype(str)
-        df['Join Quarter'] = df['Join Date'].dt.to_period('Q').astype(str)
+        df['Join Month'] = _period_labels(df['Join Date'], 'M')
+        df['Join Quarter'] = _period_labels(df['Join Date'], 'Q')
 
     if 'Exit Date' in df.columns:
         df['Exit Year'] = df['Exit Date'].dt.year
-        df['Exit Month'] = df['Exit Date'].dt.to_period('M').astype(str)
+        df['Exit Month'] = _period_labels(df['Exit Date'], 'M')
+
+    # Status flags, summed by the groupby aggregations instead of per-group lambdas
+    if 'Employee Status' in df.columns:
+        df['_active'] = _value_mask(df['Employee Status'], 'Active').astype('int8')
+        df['_departed'] = _value_mask(df['Employee Status'], 'Departed').astype('int8')
+
+    # Rows whose recorded position after joining differs from the hiring position
+    if 'Position After Joining' in df.columns and 'Position' in df.columns:
+        after = df['Position After Joining']
+        df['_pos_changed'] = (
+            after.notna().to_numpy() & (df['Position'].to_numpy() != after.to_numpy())
+        ).astype('int8')
 
     # Probation status
     if 'Probation Period End Date' in df.columns:
-        df['Probation Completed'] = np.where(
-            df['Probation Period End Date'].notna() & (df['Probation Period End Date'] <= today),
-            'Completed',
-            np.where(
-                df['Employee Status'] == 'Departed',
-                np.where(
-                    df['Probation Period End Date'].notna() & (df['Exit Date'] < df['Probation Period End Date']),
-                    'Left During Probation',
-                    'Completed Before Exit'
-                ),
-                np.where(
-                    df['Probation Period End Date'].notna(),
-                    'In Probation',
-                    'No Data'
-                )
-            )
+        prob_end = df['Probation Period End Date']
+        has_end = prob_end.notna().to_numpy()
+        departed = _value_mask(df['Employee Status'], 'Departed')
+        df['Probation Completed'] = np.select(
+            [
+                has_end & (prob_end <= today).to_numpy(),
+                departed & has_end & (df['Exit Date'] < prob_end).to_numpy(),
+                departed,
+                has_end,
+            ],
+            ['Completed', 'Left During Probation', 'Completed Before Exit', 'In Probation'],
+            default='No Data',
         )
 
     # Employment type cleanup
@@ -94,6 +170,7 @@ def process_data(df):
         df['Employment Type'] = df['Type'].fillna('Unknown')
     else:
         df['Employment Type'] = 'Unknown'
+    df['_is_contractor'] = _contractor_mask(df['Employment Type'])
 
     # Vendor cleanup
     if 'Vendor' in df.columns:
@@ -107,6 +184,10 @@ def process_data(df):
     if 'Exit ReasonList' in df.columns:
         df['Exit ReasonList'] = df['Exit ReasonList'].fillna('')
 
+    for col in CATEGORICAL_COLUMNS:
+        if col in df.columns:
+            df[col] = df[col].astype('category')
+
     return df
 
 
@@ -114,39 +195,47 @@ def process_data(df):
 def calculate_kpis(df):
     """Calculate all KPI metrics from filtered dataframe."""
     total = len(df)
-    active = len(df[df['Employee Status'] == 'Active'])
-    departed = len(df[df['Employee Status'] == 'Departed'])
+    active = int(_value_mask(df['Employee Status'], 'Active').sum())
+    departed = int(_value_mask(df['Employee Status'], 'Departed').sum())
     attrition_rate = (departed / total * 100) if total > 0 else 0
     avg_tenure = df['Tenure (Months)'].mean() if 'Tenure (Months)' in df.columns else 0
-    avg_age = df[df['Age'] > 0]['Age'].mean() if 'Age' in df.columns else 0
-    if pd.isna(avg_age):
-        avg_age = 0
+    avg_age = 0
+    if 'Age' in df.columns:
+        ages = df['Age'].to_numpy()
+        ages = ages[ages > 0]
+        if len(ages) > 0:
+            avg_age = ages.mean()
 
     retention_rate = (active / total * 100) if total > 0 else 0
 
     contractor_ratio = 0
-    if 'Employment Type' in df.columns:
-        freelancers = len(df[df['Employment Type'].str.contains('Freelancer|freelancer|Contract', case=False, na=False)])
+    if '_is_contractor' in df.columns or 'Employment Type' in df.columns:
+        # Frames that did not go through process_data lack the precomputed flag
+        is_contractor = (df['_is_contractor'].to_numpy() if '_is_contractor' in df.columns
+                         else _contractor_mask(df['Employment Type']))
+        freelancers = int(is_contractor.sum())
         contractor_ratio = (freelancers / total * 100) if total > 0 else 0
 
     nationality_count = df['Nationality'].nunique() if 'Nationality' in df.columns else 0
 
-    male_count = len(df[df['Gender'] == 'M']) if 'Gender' in df.columns else 0
-    female_count = len(df[df['Gender'] == 'F']) if 'Gender' in df.columns else 0
+    male_count = int(_value_mask(df['Gender'], 'M').sum()) if 'Gender' in df.columns else 0
+    female_count = int(_value_mask(df['Gender'], 'F').sum()) if 'Gender' in df.columns else 0
     gender_ratio = f"{male_count}:{female_count}"
 
     probation_pass_rate = 0
     if 'Probation Completed' in df.columns:
-        prob_data = df[df['Probation Completed'] != 'No Data']
-        if len(prob_data) > 0:
-            completed = len(prob_data[prob_data['Probation Completed'].isin(['Completed', 'Completed Before Exit'])])
-            probation_pass_rate = (completed / len(prob_data) * 100)
+        probation = df['Probation Completed'].to_numpy()
+        with_data = int((probation != 'No Data').sum())
+        if with_data > 0:
+            completed = int(np.isin(probation, ['Completed', 'Completed Before Exit']).sum())
+            probation_pass_rate = (completed / with_data * 100)
 
     growth_rate = 0
     if 'Join Year' in df.columns:
         current_year = datetime.now().year
-        hired_this_year = len(df[df['Join Year'] == current_year])
-        hired_last_year = len(df[df['Join Year'] == current_year - 1])
+        join_year = df['Join Year'].to_numpy()
+        hired_this_year = int((join_year == current_year).sum())
+        hired_last_year = int((join_year == current_year - 1).sum())
         if hired_last_year > 0:
             growth_rate = ((hired_this_year - hired_last_year) / hired_last_year * 100)
 
@@ -173,10 +262,10 @@ def get_cohort_retention(df):
     if 'Join Year' not in df.columns or len(df) == 0:
         return pd.DataFrame()
 
-    cohort = df.groupby('Join Year').agg(
+    cohort = _status_flags(df).groupby('Join Year').agg(
         Total=('Employee Status', 'count'),
-        Active=('Employee Status', lambda x: (x == 'Active').sum()),
-        Departed=('Employee Status', lambda x: (x == 'Departed').sum())
+        Active=('_active', 'sum'),
+        Departed=('_departed', 'sum'),
     ).reset_index()
 
     cohort = cohort[cohort['Join Year'] > 2000]
@@ -186,6 +275,7 @@ def get_cohort_retention(df):
     return cohort
 
 
+@st.cache_data
 def get_manager_attrition(df):
     """Analyze attrition linked to managers."""
     col = 'Direct Manager CRM while Resignation'
@@ -207,11 +297,16 @@ def get_manager_attrition(df):
     agg_dict = {'Departures': (count_col, 'count')}
     if has_tenure:
         agg_dict['Avg_Tenure'] = ('Tenure (Months)', 'mean')
-    if has_reason:
-        agg_dict['Top_Reason'] = ('Exit Reason Category', lambda x: x.mode().iloc[0] if len(x.mode()) > 0 else 'N/A')
 
     manager_data = mgr_df.groupby(col).agg(**agg_dict).reset_index()
 
+    if has_reason:
+        # Most frequent reason per manager. Reasons are sorted within each manager,
+        # so idxmax keeps the alphabetical tie-break that Series.mode() would give.
+        reason_counts = mgr_df.groupby([col, 'Exit Reason Category'], observed=True).size()
+        top_reason = reason_counts.groupby(level=0).idxmax().str[1]
+        manager_data['Top_Reason'] = manager_data[col].map(top_reason).fillna('N/A')
+
     rename = {col: 'Manager CRM', 'Departures': 'Departures'}
     if has_tenure:
         rename['Avg_Tenure'] = 'Avg Tenure (Months)'
@@ -224,19 +319,34 @@ def get_manager_attrition(df):
     return manager_data.sort_values('Departures', ascending=False)
 
 
+def observed_counts(series):
+    """value_counts() without the zero rows a categorical column reports for unused categories."""
+    counts = series.value_counts()
+    return counts[counts > 0]
+
+
+def project_columns(df, columns):
+    """Narrow df to those of columns it has, so cached helpers hash and scan only what they read."""
+    return df[[c for c in columns if c in df.columns]]
+
+
+def public_columns(df):
+    """Return the user-facing columns of df, leaving out internal '_' helper flags."""
+    return [c for c in df.columns if not str(c).startswith('_')]
+
+
 def save_to_excel(df, file_path):
     """Save dataframe back to Excel, preserving original column names."""
-    save_df = df.copy()
-
     reverse_map = {
         'Join Date': 'Join Date (yyyy/mm/dd)',
         'Exit Date': 'Exit Date yyyy/mm/dd',
         'Position After Joining': 'Position (After Joining)',
     }
-    save_df = save_df.rename(columns={k: v for k, v in reverse_map.items() if k in save_df.columns})
+    calc_cols = {'Age', 'Tenure (Months)', 'Join Year', 'Join Month', 'Join Quarter',
+                 'Exit Year', 'Exit Month', 'Probation Completed', 'Employment Type'}
 
-    calc_cols = ['Age', 'Tenure (Months)', 'Join Year', 'Join Month', 'Join Quarter',
-                 'Exit Year', 'Exit Month', 'Probation Completed', 'Employment Type']
-    save_df = save_df.drop(columns=[c for c in calc_cols if c in save_df.columns], errors='ignore')
+    # Select and relabel at write time instead of copying the frame
+    columns = [c for c in public_columns(df) if c not in calc_cols]
+    header = [reverse_map.get(c, c) for c in columns]
 
-    save_df.to_excel(file_path, index=False)
+    df.to_excel(file_path, index=False, columns=columns, header=header, engine='xlsxwriter')
@@ -1,50 +1,120 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
-from datetime import datetime
 
+from src.config import LAYOUT_BAR, TRACES_BAR_PCT
 from src.utils import _style
 
 
-def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG):
-    adv_departed = filtered_df[filtered_df['Employee Status'] == 'Departed']
+@st.cache_data(show_spinner=False)
+def _compute_retention_90(filtered_df, cutoff_90):
+    """Return (measurable count, left-within-90-days count, per-department table)."""
+    departed_mask = (filtered_df['Employee Status'] == 'Departed').to_numpy()
+    measurable_mask = (filtered_df['Join Date'] <= cutoff_90).to_numpy()
+    measurable_count = int(measurable_mask.sum())
+    if measurable_count == 0:
+        return 0, 0, pd.DataFrame()
+
+    # Missing exit dates give NaN days, which never compare <= 90
+    stay_days = (filtered_df['Exit Date'] - filtered_df['Join Date']).dt.days.to_numpy()
+    left_90 = measurable_mask & departed_mask & (stay_days <= 90)
+
+    dept_90 = pd.DataFrame({
+        'Department': filtered_df['Department'].to_numpy()[measurable_mask],
+        '_left_90': left_90[measurable_mask].astype('int8'),
+    }).groupby('Department', observed=True).agg(
+        Total=('_left_90', 'size'),
+        **{'Left <90d': ('_left_90', 'sum')},
+    ).reset_index()
+    dept_90['Retention %'] = ((1 - dept_90['Left <90d'] / dept_90['Total']) * 100).round(1)
+    return measurable_count, int(left_90.sum()), dept_90.sort_values('Retention %')
+
+
+def _month_ordinals(dates):
+    """Return year * 12 + month - 1 for the non-missing dates as an int array."""
+    dates = dates.dropna()
+    return (dates.dt.year.to_numpy() * 12 + dates.dt.month.to_numpy() - 1).astype(np.int32)
+
+
+@st.cache_data(show_spinner=False)
+def _compute_turnover(filtered_df):
+    """Return the monthly (last 24 months) and quarterly turnover tables."""
+    departed_mask = (filtered_df['Employee Status'] == 'Departed').to_numpy()
+    hire_ords = _month_ordinals(filtered_df['Join Date'])
+    exit_ords = _month_ordinals(filtered_df['Exit Date'][departed_mask])
+
+    # Count both series against one shared month range so months without
+    # hires or exits show as zero instead of needing an outer merge
+    observed = np.concatenate([hire_ords, exit_ords])
+    lo, hi = (int(observed.min()), int(observed.max())) if len(observed) else (0, -1)
+    month_ords = np.arange(lo, hi + 1)
+    turnover_df = pd.DataFrame({
+        'Period': [f"{o // 12}-{o % 12 + 1:02d}" for o in month_ords],
+        'Hires': np.bincount(hire_ords - lo, minlength=len(month_ords)),
+        'Exits': np.bincount(exit_ords - lo, minlength=len(month_ords)),
+    }).tail(24)
+    cum_hires = np.cumsum(turnover_df['Hires'].to_numpy())
+    turnover_df['Cumulative Hires'] = cum_hires
+    turnover_df['Turnover Rate %'] = np.round(
+        turnover_df['Exits'].to_numpy() / np.maximum(cum_hires, 1) * 100, 1
+    )
+
+    # Quarters straight from the month ordinals of the rows kept above
+    quarter_keys, quarter_codes = np.unique(month_ords[-24:] // 3, return_inverse=True)
+    quarter_labels = np.array([f"{q // 4}Q{q % 4 + 1}" for q in quarter_keys], dtype=object)
+    turnover_df['Quarter'] = quarter_labels[quarter_codes]
+    q_df = pd.DataFrame({
+        'Quarter': quarter_labels,
+        'Exits': np.bincount(quarter_codes, weights=turnover_df['Exits'].to_numpy(),
+                             minlength=len(quarter_keys)).astype('int64'),
+        'Hires': np.bincount(quarter_codes, weights=turnover_df['Hires'].to_numpy(),
+                             minlength=len(quarter_keys)).astype('int64'),
+    })
+    q_df['Turnover Rate %'] = (q_df['Exits'] / q_df['Hires'].replace(0, 1) * 100).round(1)
+    return turnover_df, q_df
 
+
+@st.fragment
+def _turnover_chart(turnover_df, q_df, CHART_CONFIG):
+    """Monthly/quarterly toggle and turnover chart; switching views reruns only this fragment."""
+    period_view = st.radio("View", ["Monthly", "Quarterly"], horizontal=True, key="turnover_period")
+
+    if period_view == "Quarterly":
+        fig = px.bar(q_df, x='Quarter', y='Turnover Rate %',
+                     color='Turnover Rate %', color_continuous_scale='RdYlGn_r',
+                     text='Turnover Rate %')
+    else:
+        fig = px.bar(turnover_df, x='Period', y='Turnover Rate %',
+                     color='Turnover Rate %', color_continuous_scale='RdYlGn_r',
+                     text='Turnover Rate %')
+
+    fig.update_traces(**TRACES_BAR_PCT)
+    fig.update_layout(**LAYOUT_BAR)
+    st.plotly_chart(_style(fig, 400), use_container_width=True, config=CHART_CONFIG)
+
+
+def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG):
     # --- 1. New Hire 90-Day Retention ---
     st.subheader("New Hire 90-Day Retention")
     if 'Join Date' in filtered_df.columns and 'Exit Date' in filtered_df.columns:
-        cutoff_90 = pd.Timestamp(datetime.now()) - pd.Timedelta(days=90)
-        measurable = filtered_df[filtered_df['Join Date'] <= cutoff_90]
+        # Day-granular cutoff so the cached result is reused for the whole day
+        cutoff_90 = pd.Timestamp.now().normalize() - pd.Timedelta(days=90)
+        measurable_count, left_count, dept_90 = _compute_retention_90(filtered_df, cutoff_90)
 
-        if len(measurable) > 0:
-            left_within_90 = measurable[
-                (measurable['Employee Status'] == 'Departed') &
-                (measurable['Exit Date'].notna()) &
-                ((measurable['Exit Date'] - measurable['Join Date']).dt.days <= 90)
-            ]
-            retention_90 = (1 - len(left_within_90) / len(measurable)) * 100
+        if measurable_count > 0:
+            retention_90 = (1 - left_count / measurable_count) * 100
 
             col1, col2, col3 = st.columns(3)
             col1.metric("90-Day Retention Rate", f"{retention_90:.1f}%")
-            col2.metric("Left Within 90 Days", f"{len(left_within_90)}")
-            col3.metric("Measurable Employees", f"{len(measurable)}")
-
-            left_90_mask = (
-                (measurable['Employee Status'] == 'Departed') &
-                measurable['Exit Date'].notna() &
-                ((measurable['Exit Date'] - measurable['Join Date']).dt.days <= 90)
-            )
-            dept_total = measurable.groupby('Department').size().rename('Total')
-            dept_left = measurable[left_90_mask].groupby('Department').size().rename('Left <90d')
-            dept_90 = pd.concat([dept_total, dept_left], axis=1).fillna(0).reset_index()
-            dept_90['Left <90d'] = dept_90['Left <90d'].astype(int)
-            dept_90['Retention %'] = ((1 - dept_90['Left <90d'] / dept_90['Total']) * 100).round(1)
-            dept_90 = dept_90.sort_values('Retention %')
+            col2.metric("Left Within 90 Days", f"{left_count}")
+            col3.metric("Measurable Employees", f"{measurable_count}")
 
             fig = px.bar(dept_90, x='Department', y='Retention %',
                          color='Retention %', color_continuous_scale='RdYlGn',
                          text='Retention %')
-            fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-            fig.update_layout(xaxis_tickangle=-45)
+            fig.update_traces(**TRACES_BAR_PCT)
+            fig.update_layout(**LAYOUT_BAR)
             st.plotly_chart(_style(fig, 400), use_container_width=True, config=CHART_CONFIG)
         else:
             st.info("Not enough data to measure 90-day retention.")
@@ -55,40 +125,8 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
 
     # --- 2. Rolling Turnover Rate ---
     st.subheader("Rolling Turnover Rate")
-    if len(adv_departed) > 0 and 'Exit Date' in adv_departed.columns:
-        monthly_exits = adv_departed.groupby(
-            adv_departed['Exit Date'].dt.to_period('M')
-        ).size().reset_index(name='Exits')
-        monthly_exits.columns = ['Period', 'Exits']
-        monthly_exits['Period'] = monthly_exits['Period'].astype(str)
-
-        monthly_hires = filtered_df.groupby(
-            filtered_df['Join Date'].dt.to_period('M')
-        ).size().reset_index(name='Hires')
-        monthly_hires.columns = ['Period', 'Hires']
-        monthly_hires['Period'] = monthly_hires['Period'].astype(str)
-
-        turnover_df = pd.merge(monthly_hires, monthly_exits, on='Period', how='outer').fillna(0)
-        turnover_df = turnover_df.sort_values('Period').tail(24)
-        turnover_df['Cumulative Hires'] = turnover_df['Hires'].cumsum()
-        turnover_df['Turnover Rate %'] = (turnover_df['Exits'] / turnover_df['Cumulative Hires'].replace(0, 1) * 100).round(1)
-
-        period_view = st.radio("View", ["Monthly", "Quarterly"], horizontal=True, key="turnover_period")
-
-        if period_view == "Quarterly":
-            turnover_df['Quarter'] = pd.to_datetime(turnover_df['Period']).dt.to_period('Q').astype(str)
-            q_df = turnover_df.groupby('Quarter').agg({'Exits': 'sum', 'Hires': 'sum'}).reset_index()
-            q_df['Turnover Rate %'] = (q_df['Exits'] / q_df['Hires'].replace(0, 1) * 100).round(1)
-            fig = px.bar(q_df, x='Quarter', y='Turnover Rate %',
-                         color='Turnover Rate %', color_continuous_scale='RdYlGn_r',
-                         text='Turnover Rate %')
-        else:
-            fig = px.bar(turnover_df, x='Period', y='Turnover Rate %',
-                         color='Turnover Rate %', color_continuous_scale='RdYlGn_r',
-                         text='Turnover Rate %')
-
-        fig.update_traces(texttemplate='%{text:.1f}%', textposition='outside')
-        fig.update_layout(xaxis_tickangle=-45)
-        st.plotly_chart(_style(fig, 400), use_container_width=True, config=CHART_CONFIG)
+    if (filtered_df['Employee Status'] == 'Departed').any() and 'Exit Date' in filtered_df.columns:
+        turnover_df, q_df = _compute_turnover(filtered_df)
+        _turnover_chart(turnover_df, q_df, CHART_CONFIG)
     else:
         st.info("No departure data available for turnover analysis.")
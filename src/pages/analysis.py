@@ -1,10 +1,18 @@
+import streamlit as st
+
 from src.pages import overview, attrition, tenure_retention, workforce, trends, advanced_analytics
 
+_SECTIONS = {
+    "Overview": overview,
+    "Attrition": attrition,
+    "Tenure & Retention": tenure_retention,
+    "Workforce": workforce,
+    "Trends": trends,
+    "Advanced Analytics": advanced_analytics,
+}
+
 
 def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG):
-    overview.render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG)
-    attrition.render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG)
-    tenure_retention.render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG)
-    workforce.render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG)
-    trends.render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG)
-    advanced_analytics.render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG)
+    # Only the selected section runs, so a rerun doesn't rebuild every page's charts
+    section = st.radio("Section", list(_SECTIONS), horizontal=True, key="analysis_section")
+    _SECTIONS[section].render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG)
@@ -1,8 +1,9 @@
 import streamlit as st
 import pandas as pd
+import numpy as np
 import plotly.express as px
 
-from src.data_processing import get_manager_attrition
+from src.data_processing import _status_flags, get_manager_attrition, observed_counts
 from src.utils import _style
 
 
@@ -12,26 +13,26 @@ _INVOLUNTARY_TYPES = ['Terminated']
 _NEON = ['#06B6D4', '#7C3AED', '#D946EF', '#10B981', '#F59E0B', '#EF4444', '#3B82F6', '#F97316']
 
 
-def _tenure_bucket(months: float) -> str:
-    days = months * 30.44
-    if days <= 10:
-        return '≤ 10 Days'
-    elif months <= 1:
-        return '10 Days – 1 Month'
-    elif months <= 3:
-        return '1 – 3 Months'
-    elif months <= 6:
-        return '3 – 6 Months'
-    elif months <= 12:
-        return '6 – 12 Months'
-    else:
-        return '> 1 Year'
-
-
 _BUCKET_ORDER = ['≤ 10 Days', '10 Days – 1 Month', '1 – 3 Months',
                  '3 – 6 Months', '6 – 12 Months', '> 1 Year']
 
 
+def _tenure_bucket_counts(months) -> pd.DataFrame:
+    """Count tenures per bucket in _BUCKET_ORDER, dropping empty buckets."""
+    months = np.asarray(months, dtype=float)
+    codes = np.select(
+        [months * 30.44 <= 10, months <= 1, months <= 3, months <= 6, months <= 12],
+        [0, 1, 2, 3, 4],
+        default=5,
+    )
+    counts = np.bincount(codes, minlength=len(_BUCKET_ORDER))
+    present = counts > 0
+    return pd.DataFrame({
+        'Tenure Bucket': np.array(_BUCKET_ORDER, dtype=object)[present],
+        'Count': counts[present],
+    })
+
+
 def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG):
     departed_df = filtered_df[filtered_df['Employee Status'] == 'Departed']
 
@@ -43,7 +44,7 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
 
     with col1:
         st.subheader("Exit Types")
-        exit_counts = departed_df['Exit Type'].value_counts().reset_index()
+        exit_counts = observed_counts(departed_df['Exit Type']).reset_index()
         exit_counts.columns = ['Exit Type', 'Count']
         fig = px.pie(exit_counts, values='Count', names='Exit Type',
                      color_discrete_sequence=['#F59E0B', '#EF4444', '#A78BFA', '#06B6D4'],
@@ -58,7 +59,7 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
 
     with col2:
         st.subheader("Exit Reason Categories")
-        reason_counts = departed_df['Exit Reason Category'].value_counts().reset_index()
+        reason_counts = observed_counts(departed_df['Exit Reason Category']).reset_index()
         reason_counts.columns = ['Category', 'Count']
         fig = px.bar(reason_counts, x='Count', y='Category', orientation='h',
                      color='Count',
@@ -71,8 +72,11 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
 
     # Voluntary vs Involuntary
     st.subheader("Voluntary vs Involuntary Turnover")
-    voluntary = len(departed_df[departed_df['Exit Type'].isin(['Resigned', 'Dropped'])])
-    involuntary = len(departed_df[departed_df['Exit Type'] == 'Terminated'])
+    # Exit-type masks are reused by the reason breakdowns below
+    vol_mask = departed_df['Exit Type'].isin(_VOLUNTARY_TYPES).to_numpy()
+    invol_mask = departed_df['Exit Type'].isin(_INVOLUNTARY_TYPES).to_numpy()
+    voluntary = int(vol_mask.sum())
+    involuntary = int(invol_mask.sum())
     total_departed = len(departed_df)
 
     col1, col2, col3 = st.columns(3)
@@ -99,17 +103,8 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
     # ── 1. Departed employees: tenure-at-exit bucket distribution ──────────
     st.subheader("Departed Employees by Tenure at Exit")
     if 'Tenure (Months)' in departed_df.columns:
-        tenure_data = departed_df[departed_df['Tenure (Months)'] >= 0].copy()
-        tenure_data['Tenure Bucket'] = tenure_data['Tenure (Months)'].apply(_tenure_bucket)
-        bucket_counts = (
-            tenure_data['Tenure Bucket']
-            .value_counts()
-            .reindex(_BUCKET_ORDER)
-            .dropna()
-            .reset_index()
-        )
-        bucket_counts.columns = ['Tenure Bucket', 'Count']
-        total_dep = len(tenure_data)
+        tenure = departed_df['Tenure (Months)'].to_numpy(dtype=float)
+        bucket_counts = _tenure_bucket_counts(tenure[tenure >= 0])
         fig = px.pie(
             bucket_counts, values='Count', names='Tenure Bucket',
             color_discrete_sequence=_NEON,
@@ -135,15 +130,11 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
 
     # ── 2. Voluntary exit reason breakdown ────────────────────────────────
     if 'Exit Reason Category' in departed_df.columns:
-        vol_df   = departed_df[departed_df['Exit Type'].isin(_VOLUNTARY_TYPES)]
-        invol_df = departed_df[departed_df['Exit Type'].isin(_INVOLUNTARY_TYPES)]
-
-        st.subheader(f"Voluntary Exit Reasons — {len(vol_df)} employees (Resigned / Dropped)")
-        if len(vol_df) > 0:
-            vol_reasons = (
-                vol_df['Exit Reason Category'].dropna()
-                .value_counts().reset_index()
-            )
+        exit_reasons = departed_df['Exit Reason Category']
+
+        st.subheader(f"Voluntary Exit Reasons — {voluntary} employees (Resigned / Dropped)")
+        if voluntary > 0:
+            vol_reasons = observed_counts(exit_reasons[vol_mask].dropna()).reset_index()
             vol_reasons.columns = ['Reason', 'Count']
             vol_total = vol_reasons['Count'].sum()
             vol_reasons['Pct'] = (vol_reasons['Count'] / vol_total * 100).round(1)
@@ -177,12 +168,9 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
         st.markdown("---")
 
         # ── 3. Involuntary exit reason breakdown ──────────────────────────
-        st.subheader(f"Involuntary Exit Reasons — {len(invol_df)} employees (Terminated)")
-        if len(invol_df) > 0:
-            invol_reasons = (
-                invol_df['Exit Reason Category'].dropna()
-                .value_counts().reset_index()
-            )
+        st.subheader(f"Involuntary Exit Reasons — {involuntary} employees (Terminated)")
+        if involuntary > 0:
+            invol_reasons = observed_counts(exit_reasons[invol_mask].dropna()).reset_index()
             invol_reasons.columns = ['Reason', 'Count']
             invol_total = invol_reasons['Count'].sum()
             invol_reasons['Pct'] = (invol_reasons['Count'] / invol_total * 100).round(1)
@@ -217,9 +205,9 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
 
     # Attrition by department
     st.subheader("Departure Rate by Department")
-    dept_attrition = filtered_df.groupby('Department').agg(
-        Active=('Employee Status', lambda x: (x == 'Active').sum()),
-        Departed=('Employee Status', lambda x: (x == 'Departed').sum()),
+    dept_attrition = _status_flags(filtered_df).groupby('Department', observed=True).agg(
+        Active=('_active', 'sum'),
+        Departed=('_departed', 'sum'),
         Total=('Employee Status', 'count')
     ).reset_index()
     dept_attrition['Departure Rate %'] = (dept_attrition['Departed'] / dept_attrition['Total'] * 100).round(1)
@@ -242,7 +230,7 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
     # Exit Reasons breakdown
     if 'Exit Reason Category' in departed_df.columns:
         st.subheader("Exit Reasons (Categorized)")
-        reason_list = departed_df[departed_df['Exit Reason Category'].notna()]['Exit Reason Category'].value_counts().reset_index()
+        reason_list = observed_counts(departed_df['Exit Reason Category'].dropna()).reset_index()
         reason_list.columns = ['Reason', 'Count']
         if len(reason_list) > 0:
             fig = px.bar(reason_list, x='Count', y='Reason', orientation='h',
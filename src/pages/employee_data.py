@@ -1,19 +1,134 @@
+import io
 import streamlit as st
 import pandas as pd
 from datetime import datetime
+from functools import lru_cache
 
+from src.data_processing import public_columns
 from src.utils import generate_summary_report, export_excel
 
 
+# Joins the searchable fields of a row; a typed query never contains it, so no match spans two fields
+_KEY_SEP = '\x1f'
+
+
+@st.cache_data(show_spinner=False)
+def _search_keys(df, NAME_COL):
+    """One lowercased key per row from the searchable columns, rebuilt only when df changes."""
+    cols = [c for c in [NAME_COL, 'PS ID', 'CRM', 'Identity number'] if c and c in df.columns]
+    if not cols:
+        return None
+    parts = [df[c].astype(str).str.lower() for c in cols]
+    return parts[0].str.cat(parts[1:], sep=_KEY_SEP)
+
+
+@st.cache_data(show_spinner=False)
+def _lowered(series):
+    """Lowercased copy of a text column, cached per distinct column content."""
+    return series.str.lower()
+
+
 def _search_employees(df, query, NAME_COL):
     """Search employees by Name, PS ID, CRM, or National ID."""
-    mask = pd.Series(False, index=df.index)
-    if NAME_COL and NAME_COL in df.columns:
-        mask |= df[NAME_COL].astype(str).str.contains(query, case=False, na=False)
-    for col in ['PS ID', 'CRM', 'Identity number']:
-        if col in df.columns:
-            mask |= df[col].astype(str).str.contains(query, case=False, na=False)
-    return df[mask]
+    keys = _search_keys(df, NAME_COL)
+    if keys is None:
+        return df.iloc[:0]
+    return df[keys.str.contains(query.lower(), regex=False, na=False)]
+
+
+@st.cache_data(show_spinner=False)
+def _csv_bytes(filtered_df):
+    # Encode straight into a byte buffer rather than building the whole CSV as a str first
+    buffer = io.BytesIO()
+    filtered_df.to_csv(buffer, index=False, columns=public_columns(filtered_df), encoding='utf-8')
+    return buffer.getvalue()
+
+
+@st.cache_data(show_spinner=False)
+def _excel_bytes(filtered_df):
+    return export_excel(filtered_df).getvalue()
+
+
+# The report header carries a minute-resolution timestamp, so let it expire after a minute
+@st.cache_data(show_spinner=False, ttl=60)
+def _summary_bytes(filtered_df, df, kpis):
+    return generate_summary_report(filtered_df, df, kpis).encode('utf-8')
+
+
+@st.cache_data(show_spinner=False)
+def _form_options(df):
+    """Dropdown choices for the add/edit forms; they only change when the data does."""
+    return {
+        'dept': sorted(df['Department'].dropna().unique().tolist()),
+        'pos': sorted(df['Position'].dropna().unique().tolist()),
+        'emp_type': (df['Employment Type'].dropna().unique().tolist()
+                     if 'Employment Type' in df.columns else ['Full time']),
+    }
+
+
+def _match_labels(matches, NAME_COL):
+    """Map each search match's row index to its dropdown label, built column-wise."""
+    names = matches[NAME_COL].astype(str) if NAME_COL and NAME_COL in matches.columns else 'N/A'
+    depts = matches['Department'].astype(str) if 'Department' in matches.columns else 'N/A'
+    idx = pd.Series(matches.index.astype(str), index=matches.index)
+    return (names + ' -- ' + depts + ' (' + idx + ')').to_dict()
+
+
+def _with_status_flags(values):
+    """Add the _active/_departed flags that process_data derives from Employee Status."""
+    status = values['Employee Status']
+    return {**values, '_active': int(status == 'Active'), '_departed': int(status == 'Departed')}
+
+
+def _set_values(df, idx, updates):
+    """Write a {column: value} dict into one row with a single .loc assignment.
+
+    New values are first added to the categories of categorical columns, and
+    the precomputed status flags follow a change to Employee Status.
+    """
+    if 'Employee Status' in updates and '_active' in df.columns:
+        updates = _with_status_flags(updates)
+    for col, value in updates.items():
+        dtype = df[col].dtype if col in df.columns else None
+        if isinstance(dtype, pd.CategoricalDtype) and value not in dtype.categories:
+            df[col] = df[col].cat.add_categories([value])
+    df.loc[idx, list(updates)] = list(updates.values())
+
+
+_TABLE_COLUMNS = ('Gender', 'Age', 'Nationality', 'Department', 'Position',
+                  'Employment Type', 'Vendor', 'Employee Status', 'Join Date', 'Exit Date',
+                  'Exit Type', 'Exit Reason Category', 'Exit Reason', 'Tenure (Months)',
+                  'Probation Completed', 'Position After Joining')
+
+
+@lru_cache(maxsize=32)
+def _available_columns(columns, NAME_COL):
+    """Table columns present in the data, in display order, keyed on the column tuple."""
+    return tuple(c for c in (NAME_COL, *_TABLE_COLUMNS) if c in columns)
+
+
+@st.fragment
+def _data_table(filtered_df, NAME_COL):
+    """Search box, column picker and table; typing here reruns only this fragment."""
+    search = st.text_input("Search by name", key="emp_search")
+    # Read-only below, so the unfiltered case can show filtered_df itself
+    display_df = filtered_df
+    if search and NAME_COL:
+        name_lower = _lowered(display_df[NAME_COL])
+        display_df = display_df[name_lower.str.contains(search.lower(), regex=False, na=False)]
+
+    available_cols = _available_columns(tuple(filtered_df.columns), NAME_COL)
+
+    selected_cols = st.multiselect(
+        "Select columns to display",
+        available_cols,
+        default=available_cols[:10],
+        key="emp_cols"
+    )
+
+    if selected_cols:
+        st.dataframe(display_df[selected_cols], use_container_width=True, height=500)
+    st.caption(f"Showing {len(display_df)} of {len(filtered_df)} filtered records")
 
 
 def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG):
@@ -23,43 +138,22 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
     if view_mode == "View Data":
         st.subheader("Employee Data Table")
 
-        search = st.text_input("Search by name", key="emp_search")
-        display_df = filtered_df.copy()
-        if search and NAME_COL:
-            display_df = display_df[display_df[NAME_COL].str.contains(search, case=False, na=False)]
-
-        all_cols = [NAME_COL, 'Gender', 'Age', 'Nationality', 'Department', 'Position',
-                    'Employment Type', 'Vendor', 'Employee Status', 'Join Date', 'Exit Date',
-                    'Exit Type', 'Exit Reason Category', 'Exit Reason', 'Tenure (Months)',
-                    'Probation Completed', 'Position After Joining']
-        available_cols = [c for c in all_cols if c in display_df.columns]
-
-        selected_cols = st.multiselect(
-            "Select columns to display",
-            available_cols,
-            default=available_cols[:10],
-            key="emp_cols"
-        )
-
-        if selected_cols:
-            st.dataframe(display_df[selected_cols], use_container_width=True, height=500)
-        st.caption(f"Showing {len(display_df)} of {len(filtered_df)} filtered records")
+        _data_table(filtered_df, NAME_COL)
 
         st.markdown("---")
 
         st.subheader("Export Data")
-        export_col1, export_col2, export_col3 = st.columns(3)
+        # download_button needs its bytes up front, so only serialize once the user opts in
+        if st.checkbox("Prepare export files", key="emp_prepare_exports"):
+            export_col1, export_col2, export_col3 = st.columns(3)
 
-        csv = filtered_df.to_csv(index=False).encode('utf-8')
-        export_col1.download_button("Download as CSV", csv, "hr_data_export.csv", "text/csv")
+            export_col1.download_button("Download as CSV", _csv_bytes(filtered_df), "hr_data_export.csv", "text/csv")
 
-        excel_buffer = export_excel(filtered_df)
-        export_col2.download_button("Download as Excel", excel_buffer, "hr_data_export.xlsx",
-                                    "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
+            export_col2.download_button("Download as Excel", _excel_bytes(filtered_df), "hr_data_export.xlsx",
+                                        "application/vnd.openxmlformats-officedocument.spreadsheetml.sheet")
 
-        summary_text = generate_summary_report(filtered_df, df, kpis)
-        export_col3.download_button("Download Summary Report", summary_text.encode('utf-8'),
-                                    "hr_summary_report.txt", "text/plain")
+            export_col3.download_button("Download Summary Report", _summary_bytes(filtered_df, df, kpis),
+                                        "hr_summary_report.txt", "text/plain")
 
         st.markdown("---")
         st.subheader("Quick Statistics")
@@ -71,17 +165,22 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
                 st.dataframe(filtered_df[num_cols].describe().round(1), use_container_width=True)
         with col2:
             st.write("**Category Counts:**")
-            st.write(f"- Departments: {filtered_df['Department'].nunique()}")
-            st.write(f"- Positions: {filtered_df['Position'].nunique()}")
-            st.write(f"- Male: {len(filtered_df[filtered_df['Gender'] == 'M'])}")
-            st.write(f"- Female: {len(filtered_df[filtered_df['Gender'] == 'F'])}")
-            if 'Employment Type' in filtered_df.columns:
-                st.write(f"- Employment Types: {filtered_df['Employment Type'].nunique()}")
-            if 'Nationality' in filtered_df.columns:
-                st.write(f"- Nationalities: {filtered_df['Nationality'].nunique()}")
+            count_cols = [c for c in ['Department', 'Position', 'Employment Type', 'Nationality']
+                          if c in filtered_df.columns]
+            uniques = filtered_df[count_cols].nunique()
+            gender_counts = filtered_df['Gender'].value_counts()
+            st.write(f"- Departments: {uniques['Department']}")
+            st.write(f"- Positions: {uniques['Position']}")
+            st.write(f"- Male: {gender_counts.get('M', 0)}")
+            st.write(f"- Female: {gender_counts.get('F', 0)}")
+            if 'Employment Type' in uniques:
+                st.write(f"- Employment Types: {uniques['Employment Type']}")
+            if 'Nationality' in uniques:
+                st.write(f"- Nationalities: {uniques['Nationality']}")
 
     elif view_mode == "Add Employee":
         st.subheader("Add New Employee")
+        options = _form_options(df)
         with st.form("add_employee_form"):
             form_col1, form_col2 = st.columns(2)
 
@@ -92,18 +191,15 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
                                              value=datetime(1995, 1, 1),
                                              min_value=datetime(1950, 1, 1))
                 new_nationality = st.text_input("Nationality", value="")
-                new_department = st.selectbox("Department *",
-                                              sorted(df['Department'].dropna().unique().tolist()))
-                new_position = st.selectbox("Position *",
-                                            sorted(df['Position'].dropna().unique().tolist()))
+                new_department = st.selectbox("Department *", options['dept'])
+                new_position = st.selectbox("Position *", options['pos'])
 
             with form_col2:
                 new_status = st.selectbox("Employee Status *", ["Active", "Departed"])
                 new_join_date = st.date_input("Join Date *")
                 new_exit_date = st.date_input("Exit Date (if departed)",
                                               value=None)
-                emp_types_list = df['Employment Type'].dropna().unique().tolist() if 'Employment Type' in df.columns else ['Full time']
-                new_type = st.selectbox("Employment Type", emp_types_list)
+                new_type = st.selectbox("Employment Type", options['emp_type'])
                 new_exit_type = st.selectbox("Exit Type", ["", "Resigned", "Terminated", "Dropped"])
                 new_exit_reason = st.text_input("Exit Reason Category", value="")
 
@@ -133,6 +229,8 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
                     if new_exit_reason:
                         new_row['Exit Reason Category'] = new_exit_reason
 
+                    if '_active' in df.columns:
+                        new_row = _with_status_flags(new_row)
                     updated_df = pd.concat([df, pd.DataFrame([new_row])], ignore_index=True)
                     st.session_state['hr_data'] = updated_df
                     st.success(f"Added {new_name} successfully!")
@@ -154,19 +252,15 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
             if len(matches) == 0:
                 st.warning("No employees found.")
             else:
-                label_to_idx = {
-                    f"{row.get(NAME_COL, 'N/A') if NAME_COL else 'N/A'} -- {row.get('Department', 'N/A')} ({idx})": idx
-                    for idx, row in matches.iterrows()
-                }
-                selected_label = st.selectbox("Select employee", list(label_to_idx.keys()))
-                emp_idx = label_to_idx[selected_label]
+                labels = _match_labels(matches, NAME_COL)
+                emp_idx = st.selectbox("Select employee", list(labels), format_func=labels.get)
                 emp_row = df.loc[emp_idx]
 
                 with st.form("edit_employee_form"):
                     ecol1, ecol2 = st.columns(2)
 
                     with ecol1:
-                        dept_list = sorted(df['Department'].dropna().unique().tolist())
+                        dept_list = _form_options(df)['dept']
                         edit_dept = st.selectbox("Department", dept_list,
                                                  index=dept_list.index(emp_row['Department']) if emp_row['Department'] in dept_list else 0)
                         edit_position = st.text_input("Position", value=str(emp_row.get('Position', '')))
@@ -185,15 +279,18 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
                     edit_submitted = st.form_submit_button("Save Changes")
 
                     if edit_submitted:
-                        df.at[emp_idx, 'Department'] = edit_dept
-                        df.at[emp_idx, 'Position'] = edit_position
-                        df.at[emp_idx, 'Employee Status'] = edit_status
+                        updates = {
+                            'Department': edit_dept,
+                            'Position': edit_position,
+                            'Employee Status': edit_status,
+                        }
                         if edit_exit_date:
-                            df.at[emp_idx, 'Exit Date'] = pd.Timestamp(edit_exit_date)
+                            updates['Exit Date'] = pd.Timestamp(edit_exit_date)
                         if edit_exit_type:
-                            df.at[emp_idx, 'Exit Type'] = edit_exit_type
+                            updates['Exit Type'] = edit_exit_type
                         if edit_exit_reason:
-                            df.at[emp_idx, 'Exit Reason Category'] = edit_exit_reason
+                            updates['Exit Reason Category'] = edit_exit_reason
+                        _set_values(df, emp_idx, updates)
 
                         st.session_state['hr_data'] = df
                         st.success(f"Updated {emp_row.get(NAME_COL, 'employee') if NAME_COL else 'employee'} successfully!")
@@ -215,13 +312,9 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
             if len(matches) == 0:
                 st.warning("No employees found.")
             else:
-                label_to_idx = {
-                    f"{row.get(NAME_COL, 'N/A') if NAME_COL else 'N/A'} -- {row.get('Department', 'N/A')} ({idx})": idx
-                    for idx, row in matches.iterrows()
-                }
-                selected_del_label = st.selectbox("Select employee to delete", list(label_to_idx.keys()),
-                                                  key="del_select")
-                del_idx = label_to_idx[selected_del_label]
+                labels = _match_labels(matches, NAME_COL)
+                del_idx = st.selectbox("Select employee to delete", list(labels), format_func=labels.get,
+                                       key="del_select")
                 emp_info = df.loc[del_idx]
                 if NAME_COL:
                     st.write(f"**Name:** {emp_info[NAME_COL]}")
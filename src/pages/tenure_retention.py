@@ -1,10 +1,101 @@
 import streamlit as st
+import pandas as pd
+import numpy as np
 import plotly.express as px
 
-from src.utils import _style
+from src.data_processing import observed_counts, project_columns
+from src.utils import _binned_histogram, _style
+
+
+# Columns the cached helpers below read
+_TENURE_COLUMNS = ['Employee Status', 'Tenure (Months)', 'Department', 'Vendor', 'Exit Type',
+                   'Exit Reason Category']
+
+
+@st.cache_data(show_spinner=False)
+def _tenure_by_dept(filtered_df):
+    tenure_dept = (
+        filtered_df.groupby('Department', observed=True)['Tenure (Months)']
+        .agg(['mean', 'median', 'count']).round(1)
+    )
+    tenure_dept.columns = ['Avg Tenure', 'Median Tenure', 'Count']
+    return tenure_dept.sort_values('Avg Tenure', ascending=False).reset_index()
+
+
+@st.cache_data(show_spinner=False)
+def _departure_stats(filtered_df):
+    """Aggregates behind the time-to-departure, early-departure and early-leaver sections."""
+    # Row positions per status, built once; every departure figure below shares one subset
+    status_rows = filtered_df.groupby('Employee Status', observed=True).indices
+    dep_all = filtered_df.take(status_rows.get('Departed', np.empty(0, dtype=np.intp)))
+    if len(dep_all) == 0:
+        return None
+    tenure = dep_all['Tenure (Months)']
+    # Left within 3 months: one mask feeds the rate KPIs, the department breakdown and the leaver list
+    early_mask = (tenure <= 3).to_numpy()
+    early_leavers = dep_all[early_mask]
+
+    stats = {
+        'count': len(dep_all),
+        'avg': tenure.mean(),
+        'median': tenure.median(),
+        'left_1m': int((tenure <= 1).sum()),
+        'early_count': len(early_leavers),
+        'early_avg': early_leavers['Tenure (Months)'].mean(),
+    }
+
+    stats['by_dept'] = (
+        dep_all.groupby('Department', observed=True)['Tenure (Months)']
+        .agg(Avg='mean', Median='median', Count='count')
+        .round(1).reset_index()
+        .sort_values('Avg')
+    )
+    if 'Vendor' in dep_all.columns:
+        stats['by_vendor'] = (
+            dep_all.groupby('Vendor', observed=True)['Tenure (Months)']
+            .agg(Avg='mean', Count='count').round(1).reset_index().sort_values('Avg')
+        )
+    if 'Exit Type' in dep_all.columns:
+        stats['by_exit'] = (
+            dep_all.groupby('Exit Type', observed=True)['Tenure (Months)']
+            .agg(Avg='mean', Count='count').round(1).reset_index().sort_values('Avg')
+        )
+
+    dept_stats = pd.DataFrame({
+        'Department': dep_all['Department'],
+        'Tenure (Months)': tenure,
+        '_early': early_mask,
+    }).groupby('Department', observed=True).agg(
+        Total_Departed=('Tenure (Months)', 'count'),
+        Early_Departed=('_early', 'sum'),
+    ).reset_index()
+    dept_stats['Early Departure Rate %'] = (
+        dept_stats['Early_Departed'] / dept_stats['Total_Departed'] * 100
+    ).round(1)
+    stats['early_by_dept'] = dept_stats.sort_values('Early Departure Rate %', ascending=False)
+
+    early_reasons = observed_counts(early_leavers['Exit Reason Category']).reset_index()
+    early_reasons.columns = ['Reason', 'Count']
+    stats['early_reasons'] = early_reasons
+    return stats
+
+
+@st.cache_data(show_spinner=False)
+def _tenure_hist_fig(filtered_df, active_color, departed_color):
+    """Tenure histogram split by employee status."""
+    groups = {
+        str(status): tenure.to_numpy()
+        for status, tenure in filtered_df.groupby('Employee Status', observed=True)['Tenure (Months)']
+    }
+    fig = _binned_histogram(groups, {'Active': active_color, 'Departed': departed_color},
+                            nbins=30, x_title='Tenure (Months)')
+    return _style(fig, 400)
 
 
 def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG):
+    tenure_df = project_columns(filtered_df, _TENURE_COLUMNS)
+    dep_stats = _departure_stats(tenure_df)
+
     st.subheader("Tenure Distribution")
 
     col1, col2 = st.columns(2)
@@ -12,18 +103,13 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
     col1.metric("Max Tenure", f"{max_tenure_years:.1f} yr")
     col2.metric("Avg Tenure", f"{filtered_df['Tenure (Months)'].mean():.1f} mo")
 
-    fig = px.histogram(filtered_df, x='Tenure (Months)', nbins=30,
-                       color='Employee Status',
-                       color_discrete_map={'Active': COLORS['success'], 'Departed': COLORS['danger']},
-                       marginal='box')
-    st.plotly_chart(_style(fig, 400), use_container_width=True, config=CHART_CONFIG)
+    st.plotly_chart(_tenure_hist_fig(tenure_df, COLORS['success'], COLORS['danger']),
+                    use_container_width=True, config=CHART_CONFIG)
 
     st.markdown("---")
 
     st.subheader("Average Tenure by Department")
-    tenure_dept = filtered_df.groupby('Department')['Tenure (Months)'].agg(['mean', 'median', 'count']).round(1)
-    tenure_dept.columns = ['Avg Tenure', 'Median Tenure', 'Count']
-    tenure_dept = tenure_dept.sort_values('Avg Tenure', ascending=False).reset_index()
+    tenure_dept = _tenure_by_dept(tenure_df)
 
     fig = px.bar(tenure_dept, x='Department', y='Avg Tenure',
                  color='Avg Tenure', color_continuous_scale='Blues',
@@ -36,21 +122,14 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
 
     # ── Time-to-Departure ─────────────────────────────────────────────────
     st.subheader("Average Tenure at Exit (Time-to-Departure)")
-    dep_all = filtered_df[filtered_df['Employee Status'] == 'Departed']
-
-    if len(dep_all) > 0 and 'Tenure (Months)' in dep_all.columns:
+    if dep_stats is not None:
         col1, col2, col3 = st.columns(3)
-        col1.metric("Avg Time-to-Departure", f"{dep_all['Tenure (Months)'].mean():.1f} mo")
-        col2.metric("Median", f"{dep_all['Tenure (Months)'].median():.1f} mo")
-        col3.metric("Left ≤ 1 Month", f"{(dep_all['Tenure (Months)'] <= 1).sum():,}")
+        col1.metric("Avg Time-to-Departure", f"{dep_stats['avg']:.1f} mo")
+        col2.metric("Median", f"{dep_stats['median']:.1f} mo")
+        col3.metric("Left ≤ 1 Month", f"{dep_stats['left_1m']:,}")
 
         # By Department
-        ttd_dept = (
-            dep_all.groupby('Department')['Tenure (Months)']
-            .agg(Avg='mean', Median='median', Count='count')
-            .round(1).reset_index()
-            .sort_values('Avg')
-        )
+        ttd_dept = dep_stats['by_dept']
         fig = px.bar(
             ttd_dept, x='Avg', y='Department', orientation='h',
             text='Avg', color='Avg',
@@ -72,11 +151,8 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
         col1, col2 = st.columns(2)
 
         with col1:
-            if 'Vendor' in dep_all.columns:
-                ttd_vendor = (
-                    dep_all.groupby('Vendor')['Tenure (Months)']
-                    .agg(Avg='mean', Count='count').round(1).reset_index().sort_values('Avg')
-                )
+            if 'by_vendor' in dep_stats:
+                ttd_vendor = dep_stats['by_vendor']
                 st.subheader("By Vendor")
                 fig = px.bar(
                     ttd_vendor, x='Avg', y='Vendor', orientation='h',
@@ -93,11 +169,8 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
                                 use_container_width=True, config=CHART_CONFIG)
 
         with col2:
-            if 'Exit Type' in dep_all.columns:
-                ttd_exit = (
-                    dep_all.groupby('Exit Type')['Tenure (Months)']
-                    .agg(Avg='mean', Count='count').round(1).reset_index().sort_values('Avg')
-                )
+            if 'by_exit' in dep_stats:
+                ttd_exit = dep_stats['by_exit']
                 st.subheader("By Exit Type")
                 fig = px.bar(
                     ttd_exit, x='Avg', y='Exit Type', orientation='h',
@@ -119,21 +192,12 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
 
     # ── Early Departure Rate by Department (<3 months) ───────────────────
     st.subheader("Early Departure Rate by Department (Left within 3 Months)")
-    dep_df_all = filtered_df[filtered_df['Employee Status'] == 'Departed']
-
-    if len(dep_df_all) > 0 and 'Tenure (Months)' in dep_df_all.columns:
-        dept_stats = dep_df_all.groupby('Department').agg(
-            Total_Departed=('Tenure (Months)', 'count'),
-            Early_Departed=('Tenure (Months)', lambda x: (x <= 3).sum()),
-        ).reset_index()
-        dept_stats['Early Departure Rate %'] = (
-            dept_stats['Early_Departed'] / dept_stats['Total_Departed'] * 100
-        ).round(1)
-        dept_stats = dept_stats.sort_values('Early Departure Rate %', ascending=False)
+    if dep_stats is not None:
+        dept_stats = dep_stats['early_by_dept']
 
         # Summary KPIs
-        total_dep   = len(dep_df_all)
-        early_dep   = (dep_df_all['Tenure (Months)'] <= 3).sum()
+        total_dep   = dep_stats['count']
+        early_dep   = dep_stats['early_count']
         c1, c2, c3  = st.columns(3)
         c1.metric("Total Departed", f"{total_dep:,}")
         c2.metric("Left Within 3 Months", f"{early_dep:,}")
@@ -169,17 +233,13 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
 
     # Early leavers
     st.subheader("Early Leavers (Left within 3 months)")
-    dep_df = filtered_df[filtered_df['Employee Status'] == 'Departed']
-    early_leavers = dep_df[dep_df['Tenure (Months)'] <= 3]
-
-    if len(early_leavers) > 0 and len(dep_df) > 0:
+    if dep_stats is not None and dep_stats['early_count'] > 0:
         col1, col2, col3 = st.columns(3)
-        col1.metric("Early Leavers", len(early_leavers))
-        col2.metric("% of Departures", f"{len(early_leavers) / len(dep_df) * 100:.1f}%")
-        col3.metric("Avg Tenure", f"{early_leavers['Tenure (Months)'].mean():.1f} mo")
+        col1.metric("Early Leavers", dep_stats['early_count'])
+        col2.metric("% of Departures", f"{dep_stats['early_count'] / dep_stats['count'] * 100:.1f}%")
+        col3.metric("Avg Tenure", f"{dep_stats['early_avg']:.1f} mo")
 
-        early_reasons = early_leavers['Exit Reason Category'].value_counts().reset_index()
-        early_reasons.columns = ['Reason', 'Count']
+        early_reasons = dep_stats['early_reasons']
         fig = px.bar(early_reasons, x='Count', y='Reason', orientation='h',
                      color='Count', color_continuous_scale='Reds')
         fig.update_layout(yaxis={'categoryorder': 'total ascending'})
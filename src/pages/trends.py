@@ -3,57 +3,111 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+from src.data_processing import project_columns
 from src.utils import _style
 
 
-def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG):
+# Columns the cached helpers below read
+_TREND_COLUMNS = ['Employee Status', 'Join Year', 'Join Month', 'Exit Year', 'Exit Month']
+
+
+@st.cache_data(show_spinner=False)
+def _trend_aggs(filtered_df):
+    """Hires and exits per month and per year; the departed rows are split off once for both."""
     trends_dep_df = filtered_df[filtered_df['Employee Status'] == 'Departed']
+    has_exits = len(trends_dep_df) > 0
+    hires_by_month = (
+        filtered_df.groupby('Join Month').size()
+        if 'Join Month' in filtered_df.columns else pd.Series(dtype=int)
+    )
+    exits_by_month = (
+        trends_dep_df.groupby('Exit Month').size()
+        if has_exits and 'Exit Month' in trends_dep_df.columns else pd.Series(dtype=int)
+    )
+    hires_by_year = (
+        filtered_df.groupby('Join Year').size()
+        if 'Join Year' in filtered_df.columns else pd.Series(dtype=int)
+    )
+    exits_by_year = trends_dep_df.groupby('Exit Year').size() if has_exits else pd.Series(dtype=int)
+    return hires_by_month, exits_by_month, hires_by_year, exits_by_year
+
+
+def _aligned_flow(hires, exits, key, periods=None):
+    """Hires and exits side by side on the sorted union of both period indexes."""
+    if periods is None:
+        periods = hires.index.union(exits.index)
+    return pd.DataFrame({
+        'Hires': hires.reindex(periods, fill_value=0).astype(int),
+        'Exits': exits.reindex(periods, fill_value=0).astype(int),
+    }, index=periods).rename_axis(key).reset_index()
+
+
+def _monthly_flow(filtered_df):
+    """Hires, exits and net change per join/exit month."""
+    hiring, exits, _, _ = _trend_aggs(filtered_df)
+    combined = _aligned_flow(hiring, exits, 'Month')
+    combined['Net'] = combined['Hires'] - combined['Exits']
+    return combined
+
+
+@st.cache_data(show_spinner=False)
+def _headcount_by_year(filtered_df):
+    headcount = filtered_df.groupby(['Join Year', 'Employee Status'], observed=True).size().unstack(fill_value=0)
+    return headcount[headcount.index > 2000]
+
+
+def _yearly_flow(filtered_df):
+    """Hires and exits per year, limited to years after 2000."""
+    _, _, hires_yr, exits_yr = _trend_aggs(filtered_df)
+
+    years = hires_yr.index.union(exits_yr.index)
+    # Exit years come out as floats when some exit dates are missing
+    return _aligned_flow(hires_yr, exits_yr, 'Year', years[years > 2000].astype(int))
+
+
+@st.cache_data(show_spinner=False)
+def _monthly_flow_fig(filtered_df):
+    combined = _monthly_flow(filtered_df)
+
+    fig = go.Figure()
+    fig.add_trace(go.Scatter(
+        x=combined['Month'], y=combined['Hires'],
+        name='Hires', mode='lines+markers',
+        line=dict(color='#10B981', width=2.5),
+        marker=dict(size=6),
+        fill='tozeroy', fillcolor='rgba(16,185,129,0.07)',
+    ))
+    fig.add_trace(go.Scatter(
+        x=combined['Month'], y=combined['Exits'],
+        name='Departures', mode='lines+markers',
+        line=dict(color='#EF4444', width=2.5),
+        marker=dict(size=6),
+        fill='tozeroy', fillcolor='rgba(239,68,68,0.07)',
+    ))
+    fig.add_trace(go.Bar(
+        x=combined['Month'], y=combined['Net'],
+        name='Net Headcount Change',
+        marker_color=[('#10B981' if v >= 0 else '#EF4444') for v in combined['Net']],
+        opacity=0.35, yaxis='y2',
+    ))
+    fig.update_layout(
+        yaxis2=dict(overlaying='y', side='right', showgrid=False,
+                    title='Net Change', title_font=dict(color='#475569'),
+                    tickfont=dict(color='#475569')),
+        xaxis=dict(tickangle=-45),
+        legend=dict(orientation='h', y=1.08),
+        hovermode='x unified',
+    )
+    return _style(fig, 460)
+
+
+def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG):
+    trend_df = project_columns(filtered_df, _TREND_COLUMNS)
 
     # ── Combined Hiring vs Departure trend ────────────────────────────────
     st.subheader("Monthly Hiring vs Departures")
     if 'Join Month' in filtered_df.columns:
-        hiring  = filtered_df.groupby('Join Month').size().rename('Hires')
-        exits   = (
-            trends_dep_df.groupby('Exit Month').size().rename('Exits')
-            if len(trends_dep_df) > 0 and 'Exit Month' in trends_dep_df.columns
-            else pd.Series(dtype=int)
-        )
-        all_months = sorted(set(hiring.index.tolist() + exits.index.tolist()))
-        combined = pd.DataFrame({'Month': all_months})
-        combined['Hires']  = combined['Month'].map(hiring).fillna(0).astype(int)
-        combined['Exits']  = combined['Month'].map(exits).fillna(0).astype(int)
-        combined['Net']    = combined['Hires'] - combined['Exits']
-
-        fig = go.Figure()
-        fig.add_trace(go.Scatter(
-            x=combined['Month'], y=combined['Hires'],
-            name='Hires', mode='lines+markers',
-            line=dict(color='#10B981', width=2.5),
-            marker=dict(size=6),
-            fill='tozeroy', fillcolor='rgba(16,185,129,0.07)',
-        ))
-        fig.add_trace(go.Scatter(
-            x=combined['Month'], y=combined['Exits'],
-            name='Departures', mode='lines+markers',
-            line=dict(color='#EF4444', width=2.5),
-            marker=dict(size=6),
-            fill='tozeroy', fillcolor='rgba(239,68,68,0.07)',
-        ))
-        fig.add_trace(go.Bar(
-            x=combined['Month'], y=combined['Net'],
-            name='Net Headcount Change',
-            marker_color=[('#10B981' if v >= 0 else '#EF4444') for v in combined['Net']],
-            opacity=0.35, yaxis='y2',
-        ))
-        fig.update_layout(
-            yaxis2=dict(overlaying='y', side='right', showgrid=False,
-                        title='Net Change', title_font=dict(color='#475569'),
-                        tickfont=dict(color='#475569')),
-            xaxis=dict(tickangle=-45),
-            legend=dict(orientation='h', y=1.08),
-            hovermode='x unified',
-        )
-        st.plotly_chart(_style(fig, 460), use_container_width=True, config=CHART_CONFIG)
+        st.plotly_chart(_monthly_flow_fig(trend_df), use_container_width=True, config=CHART_CONFIG)
     else:
         st.info("Join Month data not available.")
 
@@ -61,8 +115,7 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
 
     # Headcount by join year and status
     st.subheader("Headcount Summary by Year")
-    headcount = filtered_df.groupby(['Join Year', 'Employee Status']).size().unstack(fill_value=0)
-    headcount = headcount[headcount.index > 2000]
+    headcount = _headcount_by_year(trend_df)
     if len(headcount) > 0:
         fig = px.bar(headcount.reset_index().melt(id_vars='Join Year', var_name='Status', value_name='Count'),
                      x='Join Year', y='Count', color='Status',
@@ -76,14 +129,7 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
     # Hire-to-Exit ratio
     st.subheader("Hire-to-Exit Ratio by Year")
     if 'Join Year' in filtered_df.columns:
-        hires_yr = filtered_df.groupby('Join Year').size().rename('Hires')
-        exits_yr = trends_dep_df.groupby('Exit Year').size().rename('Exits') if len(trends_dep_df) > 0 else pd.Series(dtype=int)
-
-        years = sorted(set(hires_yr.index.tolist() + exits_yr.index.tolist()))
-        years = [y for y in years if y > 2000]
-        net_df = pd.DataFrame({'Year': years})
-        net_df['Hires'] = net_df['Year'].map(hires_yr).fillna(0).astype(int)
-        net_df['Exits'] = net_df['Year'].map(exits_yr).fillna(0).astype(int)
+        net_df = _yearly_flow(trend_df)
 
         ratio_df = net_df[net_df['Exits'] > 0].copy()
         if len(ratio_df) > 0:
@@ -1,15 +1,43 @@
 import streamlit as st
 import plotly.express as px
 
+from src.data_processing import _status_flags, observed_counts, project_columns
 from src.utils import _style
 
 
+@st.cache_data(show_spinner=False)
+def _vendor_tables(filtered_df):
+    """Headcount, status split and departure rate per vendor."""
+    vendor_counts = observed_counts(filtered_df['Vendor']).reset_index()
+    vendor_counts.columns = ['Vendor', 'Count']
+    vendor_status = (
+        filtered_df.groupby(['Vendor', 'Employee Status'], observed=True)
+        .size().reset_index(name='Count')
+    )
+    vendor_attrition = _status_flags(filtered_df).groupby('Vendor', observed=True).agg(
+        Total=('Employee Status', 'count'),
+        Departed=('_departed', 'sum'),
+    ).reset_index()
+    vendor_attrition['Departure Rate %'] = (vendor_attrition['Departed'] / vendor_attrition['Total'] * 100).round(1)
+    return vendor_counts, vendor_status, vendor_attrition
+
+
+@st.cache_data(show_spinner=False)
+def _position_changes(filtered_df):
+    """Rows with position data, rows whose position changed, and changes per department."""
+    changed = filtered_df['_pos_changed'].to_numpy() == 1
+    change_dept = observed_counts(filtered_df.loc[changed, 'Department']).reset_index()
+    change_dept.columns = ['Department', 'Changes']
+    return int(filtered_df['Position After Joining'].notna().sum()), int(changed.sum()), change_dept
+
+
 def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG):
     # Vendor analysis
     if 'Vendor' in filtered_df.columns:
         st.subheader("Vendor / Source Analysis")
-        vendor_counts = filtered_df['Vendor'].value_counts().reset_index()
-        vendor_counts.columns = ['Vendor', 'Count']
+        vendor_counts, vendor_status, vendor_attrition = _vendor_tables(
+            project_columns(filtered_df, ['Vendor', 'Employee Status', '_departed'])
+        )
 
         col1, col2 = st.columns(2)
         with col1:
@@ -19,18 +47,12 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
             st.plotly_chart(_style(fig, 380), use_container_width=True, config=CHART_CONFIG)
 
         with col2:
-            vendor_status = filtered_df.groupby(['Vendor', 'Employee Status']).size().reset_index(name='Count')
             fig = px.bar(vendor_status, x='Vendor', y='Count', color='Employee Status',
                          color_discrete_map={'Active': COLORS['success'], 'Departed': COLORS['danger']},
                          barmode='group')
             st.plotly_chart(_style(fig, 400), use_container_width=True, config=CHART_CONFIG)
 
         # Vendor attrition rates
-        vendor_attrition = filtered_df.groupby('Vendor').agg(
-            Total=('Employee Status', 'count'),
-            Departed=('Employee Status', lambda x: (x == 'Departed').sum())
-        ).reset_index()
-        vendor_attrition['Departure Rate %'] = (vendor_attrition['Departed'] / vendor_attrition['Total'] * 100).round(1)
         st.dataframe(vendor_attrition, use_container_width=True, hide_index=True)
 
     st.markdown("---")
@@ -38,16 +60,15 @@ def render(df, filtered_df, kpis, NAME_COL, COLORS, COLOR_SEQUENCE, CHART_CONFIG
     # Position changes
     if 'Position After Joining' in filtered_df.columns:
         st.subheader("Position Changes After Joining")
-        pos_change = filtered_df[filtered_df['Position After Joining'].notna()]
-        changed = pos_change[pos_change['Position'] != pos_change['Position After Joining']]
+        n_with_data, n_changed, change_dept = _position_changes(
+            project_columns(filtered_df, ['Position After Joining', '_pos_changed', 'Department'])
+        )
 
         col1, col2 = st.columns(2)
-        col1.metric("Employees with Position Data", len(pos_change))
-        col2.metric("Position Changes", len(changed))
+        col1.metric("Employees with Position Data", n_with_data)
+        col2.metric("Position Changes", n_changed)
 
-        if len(changed) > 0:
-            change_dept = changed['Department'].value_counts().reset_index()
-            change_dept.columns = ['Department', 'Changes']
+        if n_changed > 0:
             fig = px.bar(change_dept, x='Department', y='Changes',
                          color='Changes', color_continuous_scale='Blues')
             fig.update_layout(xaxis_tickangle=-45)
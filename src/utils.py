@@ -1,7 +1,12 @@
 import io
+import numpy as np
 import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
 from datetime import datetime
 
+from src.data_processing import _status_flags, _value_mask, observed_counts, public_columns
+
 
 _DARK_BG   = 'rgba(0,0,0,0)'         # transparent — card provides background
 _GRID      = 'rgba(255,255,255,0.05)'
@@ -11,41 +16,86 @@ _TEXT_CLR  = '#94A3B8'
 _FONT_FAM  = 'Space Grotesk, Inter, system-ui, sans-serif'
 
 
+# Static part of the chart styling, built once at import and reused by every _style call
+_BASE_LAYOUT = dict(
+    font=dict(family=_FONT_FAM, size=12, color=_TEXT_CLR),
+    paper_bgcolor=_DARK_BG,
+    plot_bgcolor=_DARK_BG,
+    margin=dict(t=44, b=36, l=36, r=20),
+    legend=dict(
+        bgcolor='rgba(22,23,40,0.8)',
+        bordercolor=_AXIS_LINE,
+        borderwidth=1,
+        font=dict(size=11, color='#CBD5E1'),
+    ),
+    xaxis=dict(
+        gridcolor=_GRID,
+        linecolor=_AXIS_LINE,
+        tickfont=dict(size=10, color=_TICK_CLR),
+        title_font=dict(size=11, color=_TICK_CLR),
+        showgrid=True,
+    ),
+    yaxis=dict(
+        gridcolor=_GRID,
+        linecolor=_AXIS_LINE,
+        tickfont=dict(size=10, color=_TICK_CLR),
+        title_font=dict(size=11, color=_TICK_CLR),
+        showgrid=True,
+    ),
+    title_font=dict(size=13, color='#E2E8F0', family=_FONT_FAM),
+    hoverlabel=dict(
+        bgcolor='#1E1F35',
+        bordercolor='rgba(124,58,237,0.5)',
+        font=dict(color='#F1F5F9', size=12),
+    ),
+)
+
+
 def _style(fig, height=400):
     """Apply dark-neon chart styling consistent with dashboard theme."""
-    fig.update_layout(
-        height=height,
-        font=dict(family=_FONT_FAM, size=12, color=_TEXT_CLR),
-        paper_bgcolor=_DARK_BG,
-        plot_bgcolor=_DARK_BG,
-        margin=dict(t=44, b=36, l=36, r=20),
-        legend=dict(
-            bgcolor='rgba(22,23,40,0.8)',
-            bordercolor=_AXIS_LINE,
-            borderwidth=1,
-            font=dict(size=11, color='#CBD5E1'),
-        ),
-        xaxis=dict(
-            gridcolor=_GRID,
-            linecolor=_AXIS_LINE,
-            tickfont=dict(size=10, color=_TICK_CLR),
-            title_font=dict(size=11, color=_TICK_CLR),
-            showgrid=True,
-        ),
-        yaxis=dict(
-            gridcolor=_GRID,
-            linecolor=_AXIS_LINE,
-            tickfont=dict(size=10, color=_TICK_CLR),
-            title_font=dict(size=11, color=_TICK_CLR),
-            showgrid=True,
-        ),
-        title_font=dict(size=13, color='#E2E8F0', family=_FONT_FAM),
-        hoverlabel=dict(
-            bgcolor='#1E1F35',
-            bordercolor='rgba(124,58,237,0.5)',
-            font=dict(color='#F1F5F9', size=12),
-        ),
-    )
+    fig.update_layout(height=height, **_BASE_LAYOUT)
+    return fig
+
+
+def _binned_histogram(groups, color_map, nbins, x_title):
+    """Stacked histogram with a box marginal, binned with numpy so only bin counts reach the browser.
+
+    ``groups`` maps a trace name to its values; every group shares one set of bin edges.
+    """
+    groups = {name: np.asarray(vals, dtype=float) for name, vals in groups.items()}
+    all_vals = np.concatenate(list(groups.values())) if groups else np.empty(0)
+    edges = np.histogram_bin_edges(all_vals, bins=nbins)
+    centers = (edges[:-1] + edges[1:]) / 2
+    bin_range = np.column_stack([edges[:-1], edges[1:]])
+
+    # Bars on the first axis pair so _style's axis styling lands on them, as with px marginals
+    fig = make_subplots(rows=2, cols=1, shared_xaxes=True, start_cell='bottom-left',
+                        row_heights=[0.8, 0.2], vertical_spacing=0.02)
+    for name, vals in groups.items():
+        if len(vals) == 0:
+            continue
+        color = color_map.get(name)
+        counts, _ = np.histogram(vals, bins=edges)
+        fig.add_trace(go.Bar(
+            x=centers, y=counts, width=np.diff(edges), name=name, legendgroup=name,
+            marker_color=color, customdata=bin_range,
+            hovertemplate=(f'{x_title}=%{{customdata[0]:.4g}}-%{{customdata[1]:.4g}}'
+                           f'<br>count=%{{y}}<extra>{name}</extra>'),
+        ), row=1, col=1)
+        # The marginal box needs five numbers rather than every row
+        q1, median, q3 = np.quantile(vals, [0.25, 0.5, 0.75])
+        iqr = q3 - q1
+        inside = vals[(vals >= q1 - 1.5 * iqr) & (vals <= q3 + 1.5 * iqr)]
+        fig.add_trace(go.Box(
+            y=[name], q1=[q1], median=[median], q3=[q3],
+            lowerfence=[inside.min()], upperfence=[inside.max()],
+            orientation='h', name=name, legendgroup=name, showlegend=False, marker_color=color,
+        ), row=2, col=1)
+
+    fig.update_layout(barmode='stack', bargap=0, showlegend=len(groups) > 1)
+    fig.update_xaxes(title_text=x_title, row=1, col=1)
+    fig.update_yaxes(title_text='count', row=1, col=1)
+    fig.update_yaxes(showticklabels=False, row=2, col=1)
     return fig
 
 
@@ -82,23 +132,33 @@ def generate_summary_report(filtered_df, df, kpis):
         "",
         "=== DEPARTMENT BREAKDOWN ===",
     ]
-    dept_summary = filtered_df.groupby('Department').agg(
+    if len(filtered_df) == 0:
+        # Filters matched nothing: both sections stay empty, so skip the aggregations
+        summary_lines += ["", "=== TOP EXIT REASONS ==="]
+        return "\n".join(summary_lines)
+
+    dept_summary = _status_flags(filtered_df).groupby('Department', observed=True).agg(
         Total=('Employee Status', 'count'),
-        Active=('Employee Status', lambda x: (x == 'Active').sum()),
-        Departed=('Employee Status', lambda x: (x == 'Departed').sum()),
+        Active=('_active', 'sum'),
+        Departed=('_departed', 'sum'),
     ).reset_index()
     dept_summary['Attrition %'] = (dept_summary['Departed'] / dept_summary['Total'] * 100).round(1)
-    for _, row in dept_summary.iterrows():
+    for dept, total, active, departed, rate in dept_summary.itertuples(index=False):
         summary_lines.append(
-            f"  {row['Department']}: {row['Total']} total, {row['Active']} active, "
-            f"{row['Departed']} departed ({row['Attrition %']}% attrition)"
+            f"  {dept}: {total} total, {active} active, "
+            f"{departed} departed ({rate}% attrition)"
         )
 
     summary_lines += ["", "=== TOP EXIT REASONS ==="]
-    departed_summary = filtered_df[filtered_df['Employee Status'] == 'Departed']
-    if len(departed_summary) > 0 and 'Exit Reason Category' in departed_summary.columns:
-        for reason, count in departed_summary['Exit Reason Category'].value_counts().head(10).items():
-            summary_lines.append(f"  {reason}: {count}")
+    if 'Exit Reason Category' in filtered_df.columns:
+        # Compare on categorical codes and slice out only the column being counted
+        departed_mask = _value_mask(filtered_df['Employee Status'], 'Departed')
+        if departed_mask.any():
+            exit_reasons = filtered_df.loc[departed_mask, 'Exit Reason Category']
+            top_reasons = observed_counts(exit_reasons).head(10)
+            summary_lines.extend(
+                f"  {reason}: {count}" for reason, count in zip(top_reasons.index, top_reasons.to_numpy())
+            )
 
     return "\n".join(summary_lines)
 
@@ -106,7 +166,7 @@ def generate_summary_report(filtered_df, df, kpis):
 def export_excel(filtered_df):
     """Export filtered dataframe to Excel bytes buffer."""
     excel_buffer = io.BytesIO()
-    filtered_df.to_excel(excel_buffer, index=False, engine='openpyxl')
+    filtered_df.to_excel(excel_buffer, index=False, engine='xlsxwriter', columns=public_columns(filtered_df))
     excel_buffer.seek(0)
     return excel_buffer
 
@@ -122,16 +182,16 @@ def export_charts_excel(filtered_df, kpis):
     with pd.ExcelWriter(buffer, engine='openpyxl') as writer:
 
         # ── Overview ──────────────────────────────────────────────────────
-        gender_counts = filtered_df['Gender'].value_counts().reset_index()
+        gender_counts = observed_counts(filtered_df['Gender']).reset_index()
         gender_counts.columns = ['Gender', 'Count']
         gender_counts.to_excel(writer, sheet_name='Gender Distribution', index=False)
 
-        status_counts = filtered_df['Employee Status'].value_counts().reset_index()
+        status_counts = observed_counts(filtered_df['Employee Status']).reset_index()
         status_counts.columns = ['Status', 'Count']
         status_counts.to_excel(writer, sheet_name='Employment Status', index=False)
 
         dept_data = (
-            filtered_df.groupby(['Department', 'Employee Status'])
+            filtered_df.groupby(['Department', 'Employee Status'], observed=True)
             .size().reset_index(name='Count')
         )
         dept_data.to_excel(writer, sheet_name='Department Breakdown', index=False)
@@ -142,18 +202,18 @@ def export_charts_excel(filtered_df, kpis):
 
         # ── Attrition ────────────────────────────────────────────────────
         if len(departed_df) > 0:
-            exit_counts = departed_df['Exit Type'].value_counts().reset_index()
+            exit_counts = observed_counts(departed_df['Exit Type']).reset_index()
             exit_counts.columns = ['Exit Type', 'Count']
             exit_counts.to_excel(writer, sheet_name='Exit Types', index=False)
 
             if 'Exit Reason Category' in departed_df.columns:
-                reason_counts = departed_df['Exit Reason Category'].value_counts().reset_index()
+                reason_counts = observed_counts(departed_df['Exit Reason Category']).reset_index()
                 reason_counts.columns = ['Category', 'Count']
                 reason_counts.to_excel(writer, sheet_name='Exit Reasons', index=False)
 
-            dept_attrition = filtered_df.groupby('Department').agg(
-                Active=('Employee Status', lambda x: (x == 'Active').sum()),
-                Departed=('Employee Status', lambda x: (x == 'Departed').sum()),
+            dept_attrition = _status_flags(filtered_df).groupby('Department', observed=True).agg(
+                Active=('_active', 'sum'),
+                Departed=('_departed', 'sum'),
                 Total=('Employee Status', 'count')
             ).reset_index()
             dept_attrition['Departure Rate %'] = (
@@ -166,7 +226,7 @@ def export_charts_excel(filtered_df, kpis):
         # ── Tenure & Retention ───────────────────────────────────────────
         if 'Tenure (Months)' in filtered_df.columns:
             tenure_dept = (
-                filtered_df.groupby('Department')['Tenure (Months)']
+                filtered_df.groupby('Department', observed=True)['Tenure (Months)']
                 .agg(['mean', 'median', 'count']).round(1)
                 .rename(columns={'mean': 'Avg Tenure', 'median': 'Median Tenure', 'count': 'Count'})
                 .reset_index()
@@ -176,15 +236,19 @@ def export_charts_excel(filtered_df, kpis):
 
             if len(departed_df) > 0:
                 ttd_dept = (
-                    departed_df.groupby('Department')['Tenure (Months)']
+                    departed_df.groupby('Department', observed=True)['Tenure (Months)']
                     .agg(Avg='mean', Median='median', Count='count')
                     .round(1).reset_index().sort_values('Avg')
                 )
                 ttd_dept.to_excel(writer, sheet_name='Time to Departure', index=False)
 
-                dept_stats = departed_df.groupby('Department').agg(
+                dept_stats = pd.DataFrame({
+                    'Department': departed_df['Department'],
+                    'Tenure (Months)': departed_df['Tenure (Months)'],
+                    '_early': departed_df['Tenure (Months)'] <= 3,
+                }).groupby('Department', observed=True).agg(
                     Total_Departed=('Tenure (Months)', 'count'),
-                    Early_Departed=('Tenure (Months)', lambda x: (x <= 3).sum()),
+                    Early_Departed=('_early', 'sum'),
                 ).reset_index()
                 dept_stats['Early Departure Rate %'] = (
                     dept_stats['Early_Departed'] / dept_stats['Total_Departed'] * 100
@@ -193,9 +257,9 @@ def export_charts_excel(filtered_df, kpis):
 
         # ── Workforce ────────────────────────────────────────────────────
         if 'Vendor' in filtered_df.columns:
-            vendor_attrition = filtered_df.groupby('Vendor').agg(
+            vendor_attrition = _status_flags(filtered_df).groupby('Vendor', observed=True).agg(
                 Total=('Employee Status', 'count'),
-                Departed=('Employee Status', lambda x: (x == 'Departed').sum())
+                Departed=('_departed', 'sum')
             ).reset_index()
             vendor_attrition['Departure Rate %'] = (
                 vendor_attrition['Departed'] / vendor_attrition['Total'] * 100
@@ -217,7 +281,7 @@ def export_charts_excel(filtered_df, kpis):
 
         if 'Join Year' in filtered_df.columns:
             headcount = (
-                filtered_df.groupby(['Join Year', 'Employee Status'])
+                filtered_df.groupby(['Join Year', 'Employee Status'], observed=True)
                 .size().unstack(fill_value=0).reset_index()
             )
             headcount[headcount['Join Year'] > 2000].to_excel(
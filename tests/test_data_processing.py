@@ -1,35 +1,33 @@
 import pandas as pd
 import numpy as np
-from datetime import datetime, timedelta
+from datetime import datetime
 
 from src.data_processing import process_data, calculate_kpis, get_cohort_retention, get_manager_attrition
 
 
 def _make_sample_df(n=20):
-    """Create a sample HR dataframe for testing."""
-    np.random.seed(42)
-    today = datetime.now()
-    rows = []
-    for i in range(n):
-        status = 'Active' if i % 3 != 0 else 'Departed'
-        join_date = today - timedelta(days=np.random.randint(90, 1800))
-        exit_date = join_date + timedelta(days=np.random.randint(30, 500)) if status == 'Departed' else pd.NaT
-        rows.append({
-            'Full Name': f'Employee {i}',
-            'Gender': 'M' if i % 2 == 0 else 'F',
-            'Birthday Date': today - timedelta(days=365 * np.random.randint(25, 55)),
-            'Nationality': ['Egyptian', 'Saudi', 'Indian'][i % 3],
-            'Department': ['IT', 'HR', 'Finance', 'Sales'][i % 4],
-            'Position': ['Analyst', 'Manager', 'Director', 'Engineer'][i % 4],
-            'Employee Status': status,
-            'Join Date (yyyy/mm/dd)': join_date,
-            'Exit Date yyyy/mm/dd': exit_date,
-            'Exit Type': 'Resigned' if status == 'Departed' and i % 2 == 0 else ('Terminated' if status == 'Departed' else ''),
-            'Exit Reason Category': 'Better Opportunity' if status == 'Departed' else '',
-            'Type': ['Full time', 'Contract', 'Freelancer'][i % 3],
-            'Vendor': ['Direct Hire', 'Agency A'][i % 2],
-        })
-    return pd.DataFrame(rows)
+    """Create a sample HR dataframe for testing, one vectorised draw per column."""
+    rng = np.random.default_rng(42)
+    today = pd.Timestamp(datetime.now())
+    i = np.arange(n)
+    departed = i % 3 == 0
+    join_date = today - pd.to_timedelta(rng.integers(90, 1800, n), unit='D')
+    exit_date = join_date + pd.to_timedelta(rng.integers(30, 500, n), unit='D')
+    return pd.DataFrame({
+        'Full Name': [f'Employee {k}' for k in i],
+        'Gender': np.where(i % 2 == 0, 'M', 'F'),
+        'Birthday Date': today - pd.to_timedelta(365 * rng.integers(25, 55, n), unit='D'),
+        'Nationality': np.array(['Egyptian', 'Saudi', 'Indian'])[i % 3],
+        'Department': np.array(['IT', 'HR', 'Finance', 'Sales'])[i % 4],
+        'Position': np.array(['Analyst', 'Manager', 'Director', 'Engineer'])[i % 4],
+        'Employee Status': np.where(departed, 'Departed', 'Active'),
+        'Join Date (yyyy/mm/dd)': join_date,
+        'Exit Date yyyy/mm/dd': exit_date.where(departed),
+        'Exit Type': np.select([departed & (i % 2 == 0), departed], ['Resigned', 'Terminated'], default=''),
+        'Exit Reason Category': np.where(departed, 'Better Opportunity', ''),
+        'Type': np.array(['Full time', 'Contract', 'Freelancer'])[i % 3],
+        'Vendor': np.array(['Direct Hire', 'Agency A'])[i % 2],
+    })
 
 
 def test_process_data_creates_age():